@@ -3,6 +3,8 @@
 import json
 import requests
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import yaml
 
 
@@ -14,13 +16,19 @@ class PhysioNetDB(object):
 
 
 base_url = 'https://physionet.org'
-physionet_database_list_url = requests.get(base_url + '/about/database')
-soup = BeautifulSoup(physionet_database_list_url.content, 'html.parser')
+session = requests.Session()
+session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=16,
+                                      max_retries=Retry(total=3, backoff_factor=0.3)))
+session.headers['Accept-Encoding'] = 'br, gzip, deflate'
+physionet_database_list_url = session.get(base_url + '/about/database')
+soup = BeautifulSoup(physionet_database_list_url.content, 'lxml',
+                     from_encoding='utf-8')
 
 
 def parseDatabasePage(href):
-    databasePage = requests.get(base_url + href, allow_redirects=True)
-    databasePageSoup = BeautifulSoup(databasePage.content, 'html.parser')
+    databasePage = session.get(base_url + href, allow_redirects=True)
+    databasePageSoup = BeautifulSoup(databasePage.content, 'lxml',
+                                     from_encoding='utf-8')
     # look for the schema.org metadata
     metaData = databasePageSoup.find('script', type='application/ld+json')
     metaDataJson = json.loads(metaData.string)
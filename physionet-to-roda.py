@@ -16,14 +16,28 @@
 """
 
 import argparse
+import asyncio
 import csv
+import hashlib
+import httpx
+import json
 import os
 import re
 import requests
 import sys
+import time
 import yaml
-from bs4 import BeautifulSoup
-from markdownify import markdownify as md
+from bs4 import BeautifulSoup, NavigableString, SoupStrainer, Tag
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from markdownify import MarkdownConverter
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Use libyaml's C implementation when PyYAML was built with it
+try:
+    from yaml import CSafeDumper as _Dumper, CSafeLoader as _Loader
+except ImportError:
+    from yaml import SafeDumper as _Dumper, SafeLoader as _Loader
 
 """
 CONFIGURATION
@@ -32,17 +46,39 @@ CONFIGURATION
 START = 0
 END = 0
 BASE_URL = 'https://physionet.org'  # Where to get this data from
+PAGE_ENCODING = 'utf-8'  # Encoding PhysioNet serves pages in, skips detection
 CONTACT_URL = 'https://physionet.org/about/#contact'
 UPDATE_FREQUENCY = 'Not updated'
 DEFAULT_DESCRIPTION = 'No description provided.'
+# Headers whose following paragraph is used as the description, in priority order
+DESCRIPTION_HEADERS = (('h3', 'Abstract'), ('h2', 'Abstract'), ('h3', 'Introduction'),
+                       ('h3', 'Data Description'), ('h3', 'Data Collection'))
 DEFAULT_MANAGED_BY = '[MIT Laboratory for Computational Physiology](http://lcp.mit.edu/)'
 DEFAULT_LICENSE = 'https://physionet.org/content/adfecgdb/view-license/1.0.0/'
 DEFAULT_S3_BUCKET = 'physionet-pds'
 DEFAULT_RESOURCE_DESCRIPTION = 'Project data files'
+MAX_CONNECTIONS = 4  # HTTP/2 connections the database pages are multiplexed over
+ACCEPT_ENCODING = 'br, gzip, deflate'  # Brotli requires the brotli package
+CACHE_DIR = 'output/.http_cache'  # Where fetched pages are kept between runs
+CACHE_EXPIRE_AFTER = 86400  # Seconds before a cached page is fetched again
+VALIDATORS_FILE = 'output/.etags.json'  # ETag/Last-Modified of each fetched page
+HASHES_FILE = 'output/.hashes.json'  # Hash of each parsed details page
+PARSER_VERSION = 1  # Bump when extraction changes so unchanged pages are parsed again
+MAX_WRITERS = 8  # Threads used to write the separate RODA files
 SINGLE_ENTRY_NAME = 'PhysioNet Open Datasets'
 SINGLE_ENTRY_DESCRIPTION = "A collection of datasets provided by the [MIT Laboratory for Computational Physiology](http://lcp.mit.edu/)"
 SINGLE_ENTRY_DOCUMENTATION = 'https://physionet.org/about/database/'
 SINGLE_ENTRY_TAGS = ['aws-pds', 'life sciences']
+# Only the elements the extract_* functions look at are parsed from a details page
+DETAILS_STRAINER = SoupStrainer(['h2', 'h3', 'strong', 'span', 'div', 'p', 'a'])
+CITE_RE = re.compile(r'When using this resource, please cite')
+# Inline tags that p_to_md converts itself, and the markdown they become
+INLINE_MARKDOWN = {'em': '*', 'i': '*', 'strong': '**', 'b': '**'}
+MARKDOWN_ESCAPE_RE = re.compile(r'([*_])')
+# Whitespace is collapsed the way markdownify does it, keeping line breaks
+NEWLINE_WHITESPACE_RE = re.compile(r'[\t \r\n]*[\r\n][\t \r\n]*')
+WHITESPACE_RE = re.compile(r'[\t ]+')
+MARKDOWN_CONVERTER = MarkdownConverter()
 STANDARD_CITATION = (' Please include the standard citation for PhysioNet: '
                      'Goldberger, A., Amaral, L., Glass, L., Hausdorff, J., Ivanov, P. C., '
                      'Mark, R., ... & Stanley, H. E. (2000). PhysioBank, PhysioToolkit, '
@@ -63,7 +99,11 @@ parser.add_argument('-t', '--db-type', dest='db_type', nargs='?',
                           'or "separate" to create a RODA file per dataset'))
 parser.add_argument('-c', '--csv', dest='csv', action='store_true',
                     help='Optionally create a CSV file of this data for debugging')
-args = parser.parse_args()
+# Share a single keep-alive connection pool for every request to PhysioNet
+session = requests.Session()
+session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=MAX_CONNECTIONS,
+                                      max_retries=Retry(total=3, backoff_factor=0.3)))
+session.headers['Accept-Encoding'] = ACCEPT_ENCODING
 
 
 class PhysioNetDB(object):
@@ -84,6 +124,9 @@ class PhysioNetDB(object):
         self.documentation = self.url
         self.managed_by = DEFAULT_MANAGED_BY
         self.update_frequency = UPDATE_FREQUENCY
+        self.unchanged = False
+        self.validators = None
+        self.digest = None
         self.resources = [
             dict(
                 Description=DEFAULT_RESOURCE_DESCRIPTION,
@@ -93,99 +136,6 @@ class PhysioNetDB(object):
             )
         ]
 
-    def extract_description(self, html):
-        """Extracts the long form description of the dataset
-        Parameters
-        ----------
-        html : bs4.BeautifulSoup
-            BeautifulSoup object that represents the entire HTML page
-
-        Returns
-        ----------
-        String
-            A string representation of the dataset's description
-        """
-        if abstract_header := html.find('h3', string='Abstract'):
-            self.description = md(str(abstract_header.find_next('p')))
-        elif abstract_header := html.find('h2', string='Abstract'):
-            self.description = md(str(abstract_header.find_next('p')))
-        elif intro_header := html.find('h3', string='Introduction'):
-            self.description = md(str(intro_header.find_next('p')))
-        elif data_description_header := html.find('h3', string='Data Description'):
-            self.description = md(str(data_description_header.find_next('p')))
-        elif data_collection_header := html.find('h3', string='Data Collection'):
-            self.description = md(str(data_collection_header.find_next('p')))
-        else:
-            self.description = DEFAULT_DESCRIPTION
-
-    def extract_tags(self, html):
-        """Extracts the tags of a dataset
-        Parameters
-        ----------
-        html : bs4.BeautifulSoup
-            BeautifulSoup object that represents the entire HTML page
-
-        Returns
-        ----------
-        List
-            List of a dataset's specified tags
-        """
-        tags = html.find_all('span', class_='badge badge-pn')
-        if tags:
-            for tag in tags:
-                self.tags.append(tag.get_text())
-
-    def extract_license(self, html):
-        """Extracts the license of a dataset
-        Parameters
-        ----------
-        html : bs4.BeautifulSoup
-            BeautifulSoup object that represents the entire HTML page
-
-        Returns
-        ----------
-        String
-            License of the dataset
-        """
-        if data_license_header := html.find(
-                'strong', string='License (for files):'):
-            self.data_license = BASE_URL + \
-                data_license_header.find_next('a').attrs['href']
-
-    def extract_citation(self, html):
-        """Extracts the license of a dataset
-        Parameters
-        ----------
-        html : bs4.BeautifulSoup
-            BeautifulSoup object that represents the entire HTML page
-
-        Returns
-        ----------
-        String
-            The contents of the alert at the top of the page which
-            contains the appropriate citations with the original
-            publication
-        """
-        if citation_alert := html.find('div', class_='alert alert-secondary'):
-            if original_publication := html.find('strong', string='When using this resource, please cite the original publication:'):
-                self.description += (' When using this resource, please cite '
-                                     'the original publication: ' + md(
-                                         str(original_publication.find_next('p'))
-                                     )
-                                     )
-            elif please_cite := html.find('strong', string=re.compile('When using this resource, please cite')):
-                # gross
-                self.description += (' When using this resource, please cite: ' +
-                                     md(
-                                         str(please_cite.find_next(
-                                             'span')).replace('<span>', '').replace('</span>', '')
-                                     )
-                                     )
-            else:
-                self.description += STANDARD_CITATION
-        else:
-            pass
-
     def generate_separate_roda(self):
         """Generates a representation of the dataset that is meant
         to be used in an individual RODA file
@@ -225,6 +175,34 @@ class PhysioNetDB(object):
         entry['Description'] = self.short_description
         return entry
 
+    def update_details(self, details):
+        """Updates the dataset with the details extracted from its
+        details page
+
+        Parameters
+        ----------
+        details : dict
+            The details returned by parse_details
+        """
+        self.description = details['description']
+        self.tags.extend(details['tags'])
+        self.data_license = details['data_license']
+
+    def restore_separate_roda(self, entry):
+        """Restores the details extracted on a previous run from the
+        contents of its individual RODA file, used when the details
+        page hasn't changed since. The file is then left as it is
+
+        Parameters
+        ----------
+        entry : dict
+            The previously generated RODA file loaded from YAML
+        """
+        self.description = entry['Description']
+        self.tags = entry['Tags']
+        self.data_license = entry['License']
+        self.unchanged = True
+
     def as_csv(self):
         """Mostly for debug purposes, this will generate a CSV file of all the datasets
         which could be helpful when examining the outputs created by this script
@@ -243,91 +221,490 @@ class PhysioNetDB(object):
         return f'{self.name} : {self.description}'
 
 
-# Query the page that has all of the datasets listed on them
-physionet_database_list_url = requests.get(BASE_URL + '/about/database')
-soup = BeautifulSoup(physionet_database_list_url.content, 'html.parser')
-open_databases = []
-
-# Look for open databases header
-databases_header = soup.find('h2', id=args.db_type)
-databases_ul = databases_header.find_next_sibling()
-
-# Create a list of all of the open databases
-for item in databases_ul:
-    if item.name == 'li':
-        entry_id = item.a.attrs['href'].split('/')[2]
-        url = item.a.attrs['href']
-        name = item.a.get_text()
-        description = item.a.next_sibling.replace(
-            ':', '').strip().replace('\n', '')
-        open_databases.append(
-            PhysioNetDB(entry_id, url, name, description)
-        )
-if END == 0:
-    END = len(open_databases)
-
-# Create the output directory if it doesn't exist
-if not os.path.isdir('output'):
-    os.mkdir('output')
-
-# Iterate over each database and get details from their respective pages
-for database in open_databases[START:END]:
-    # Get the database's full details page
-    database_details = requests.get(database.url, allow_redirects=True)
-    database_details_html = BeautifulSoup(
-        database_details.content, 'html.parser')
-
-    # Update the database entry with a full description
-    database.extract_description(database_details_html)
-
-    # Get the tags if available
-    database.extract_tags(database_details_html)
-
-    # Get the license if available
-    database.extract_license(database_details_html)
-
-    # Get citation information
-    database.extract_citation(database_details_html)
-
-# If in separate file mode, generate a separate YAML file for each dataset
-if args.format == 'separate':
-    for database in open_databases[START:END]:
-        with open(f'output/{database.entry_id}.yaml', 'w') as f:
-            yaml.dump(database.generate_separate_roda(), f)
-# If in single file mode, generate a single YAML file with multiple resources
-elif args.format == 'single':
-    entry = dict(
-        Name=SINGLE_ENTRY_NAME,
-        Description=SINGLE_ENTRY_DESCRIPTION,
-        Documentation=SINGLE_ENTRY_DOCUMENTATION,
-        Contact=CONTACT_URL,
-        ManagedBy=DEFAULT_MANAGED_BY,
-        UpdateFrequency=UPDATE_FREQUENCY,
-        Tags=SINGLE_ENTRY_TAGS,
-        License=DEFAULT_LICENSE,
-        Resources=[]
+def cache_path(url):
+    """Gets where a page is kept in the on-disk cache. Pages are keyed
+    by their full URL, so a new version of a dataset isn't served from
+    the previous version's cache entry
+    Parameters
+    ----------
+    url : str
+        URL of the page
+
+    Returns
+    ----------
+    String
+        Path of the page's cache file
+    """
+    return os.path.join(CACHE_DIR, hashlib.blake2b(url.encode(), digest_size=16).hexdigest() + '.html')
+
+
+def read_cache(url):
+    """Reads a previously fetched page from the on-disk cache
+    Parameters
+    ----------
+    url : str
+        URL of the page
+
+    Returns
+    ----------
+    Bytes
+        The cached page, or None if it isn't cached or has expired
+    """
+    path = cache_path(url)
+    try:
+        if time.time() - os.path.getmtime(path) < CACHE_EXPIRE_AFTER:
+            with open(path, 'rb') as f:
+                return f.read()
+    except FileNotFoundError:
+        pass
+    return None
+
+
+def write_cache(url, content):
+    """Stores a fetched page in the on-disk cache
+    Parameters
+    ----------
+    url : str
+        URL of the page
+    content : bytes
+        Raw HTML of the page
+    """
+    with open(cache_path(url), 'wb') as f:
+        f.write(content)
+
+
+def refresh_cache(url):
+    """Marks a cached page as fresh again, used when the server reports
+    it hasn't been modified
+    Parameters
+    ----------
+    url : str
+        URL of the page
+    """
+    try:
+        os.utime(cache_path(url))
+    except FileNotFoundError:
+        pass
+
+
+def tag_to_md(tag):
+    """Converts an already parsed tag to markdown, without serializing
+    it back to HTML for markdownify to parse again
+    Parameters
+    ----------
+    tag : bs4.element.Tag
+        The tag to convert
+
+    Returns
+    ----------
+    String
+        The markdown representation of the tag
+    """
+    if tag is None:
+        return str(tag)
+    return MARKDOWN_CONVERTER.convert_soup(tag).strip()
+
+
+def text_to_md(text):
+    """Converts a string of a paragraph to markdown, collapsing its
+    whitespace and escaping the characters markdown would interpret
+    Parameters
+    ----------
+    text : str
+        The text to convert
+
+    Returns
+    ----------
+    String
+        The markdown representation of the text
+    """
+    text = WHITESPACE_RE.sub(' ', NEWLINE_WHITESPACE_RE.sub('\n', text))
+    return MARKDOWN_ESCAPE_RE.sub(r'\\\1', text)
+
+
+def p_to_md(p):
+    """Converts a paragraph to markdown. Paragraphs that only contain
+    text, links and emphasis are converted directly, anything else is
+    left to markdownify
+    Parameters
+    ----------
+    p : bs4.element.Tag
+        The paragraph to convert
+
+    Returns
+    ----------
+    String
+        The markdown representation of the paragraph
+    """
+    if p is None:
+        return tag_to_md(p)
+    parts = []
+    for child in p.children:
+        if type(child) is NavigableString:
+            parts.append(text_to_md(child))
+        elif isinstance(child, Tag):
+            # Only tags holding nothing but text are simple enough
+            if len(child.contents) != 1 or type(child.contents[0]) is not NavigableString:
+                return tag_to_md(p)
+            text = text_to_md(child.string)
+            # Keep the spaces around the tag's text outside of the markdown
+            prefix = ' ' if text[:1] == ' ' else ''
+            suffix = ' ' if text[-1:] == ' ' else ''
+            text = text.strip()
+            if child.name == 'a' and (href := child.get('href')) and not child.get('title'):
+                if not text:
+                    markdown = ''
+                elif text.replace('\\_', '_') == href:
+                    markdown = f'<{href}>'
+                else:
+                    markdown = f'{prefix}[{text}]({href}){suffix}'
+            elif child.name in INLINE_MARKDOWN:
+                markup = INLINE_MARKDOWN[child.name]
+                markdown = f'{prefix}{markup}{text}{markup}{suffix}' if text else ''
+            else:
+                return tag_to_md(p)
+            parts.append(markdown)
+    # Like markdownify, line breaks meeting across elements become a single one
+    return ''.join(parts).replace('\n\n', '\n').strip()
+
+
+def index_page(html):
+    """Walks a details page once, collecting the elements the extract_*
+    functions look for so they don't each have to search the page
+    Parameters
+    ----------
+    html : bs4.BeautifulSoup
+        BeautifulSoup object that represents the entire HTML page
+
+    Returns
+    ----------
+    Dict
+        The first h2/h3 header and strong element for each text, every
+        tag badge and the first citation alert of the page
+    """
+    page = dict(headers={}, strongs={}, badges=[], alert=None)
+    for element in html.find_all(['h2', 'h3', 'strong', 'span', 'div']):
+        if element.name in ('h2', 'h3'):
+            page['headers'].setdefault((element.name, element.string), element)
+        elif element.name == 'strong':
+            page['strongs'].setdefault(element.string, element)
+        elif element.name == 'span':
+            if ' '.join(element.get('class', [])) == 'badge badge-pn':
+                page['badges'].append(element)
+        elif page['alert'] is None:
+            if ' '.join(element.get('class', [])) == 'alert alert-secondary':
+                page['alert'] = element
+    return page
+
+
+def extract_description(page):
+    """Extracts the long form description of the dataset
+    Parameters
+    ----------
+    page : dict
+        Index of the entire HTML page built by index_page
+
+    Returns
+    ----------
+    String
+        A string representation of the dataset's description
+    """
+    for candidate in DESCRIPTION_HEADERS:
+        if description_header := page['headers'].get(candidate):
+            return p_to_md(description_header.find_next('p'))
+    return DEFAULT_DESCRIPTION
+
+
+def extract_tags(page):
+    """Extracts the tags of a dataset
+    Parameters
+    ----------
+    page : dict
+        Index of the entire HTML page built by index_page
+
+    Returns
+    ----------
+    List
+        List of a dataset's specified tags
+    """
+    return [tag.get_text() for tag in page['badges']]
+
+
+def extract_license(page):
+    """Extracts the license of a dataset
+    Parameters
+    ----------
+    page : dict
+        Index of the entire HTML page built by index_page
+
+    Returns
+    ----------
+    String
+        License of the dataset
+    """
+    if data_license_header := page['strongs'].get('License (for files):'):
+        return BASE_URL + data_license_header.find_next('a').attrs['href']
+    return ''
+
+
+def extract_citation(page):
+    """Extracts the citation of a dataset
+    Parameters
+    ----------
+    page : dict
+        Index of the entire HTML page built by index_page
+
+    Returns
+    ----------
+    String
+        The contents of the alert at the top of the page which
+        contains the appropriate citations with the original
+        publication, to be appended to the description
+    """
+    if citation_alert := page['alert']:
+        if original_publication := page['strongs'].get('When using this resource, please cite the original publication:'):
+            return (' When using this resource, please cite '
+                    'the original publication: ' + p_to_md(
+                        original_publication.find_next('p')
+                    )
+                    )
+        elif please_cite := next((strong for text, strong in page['strongs'].items()
+                                  if text and CITE_RE.search(text)), None):
+            return (' When using this resource, please cite: ' +
+                    tag_to_md(please_cite.find_next('span'))
+                    )
+        else:
+            return STANDARD_CITATION
+    return ''
+
+
+def parse_details(content):
+    """Parses a database's details page. This is CPU bound, so pages
+    are parsed in a pool of processes
+    Parameters
+    ----------
+    content : bytes
+        Raw HTML of the database's details page
+
+    Returns
+    ----------
+    Dict
+        The description (including citation), tags and license
+        extracted from the page
+    """
+    database_details = index_page(BeautifulSoup(
+        content, 'lxml', parse_only=DETAILS_STRAINER, from_encoding=PAGE_ENCODING))
+    return dict(
+        # Full description followed by the citation information
+        description=(extract_description(database_details) +
+                     extract_citation(database_details)),
+        # Tags if available
+        tags=extract_tags(database_details),
+        # License if available
+        data_license=extract_license(database_details)
     )
-    for database in open_databases[START:END]:
-        entry['Resources'].append(database.generate_single_roda())
-        for tag in database.tags:
-            if tag not in entry['Tags']:
-                entry['Tags'].append(tag)
-    with open('output/single.yaml', 'w') as f:
-        yaml.dump(entry, f)
-# Not sure how we got here?
-else:
-    print('Unknown YAML format specified')
-    sys.exit(1)
-
-# Optionally write all of the data to a CSV file to quickly look at the data
-if args.csv:
-    with open('output/databases.csv', 'w') as f:
-        output = csv.writer(f)
-        output.writerow(
-            ['name', 'contact', 'managed_by', 'license', 'documentation',
-             'update_frequency', 'tags', 'description']
+
+
+async def fetch(client, pool, database, validators, hashes):
+    """Downloads a database's full details page, unless a fresh copy is
+    cached, and hands it off to the process pool to be parsed, keeping
+    the event loop free for the other downloads. If the page
+    hasn't been modified or its content is the same as on the last run,
+    the details are restored from the database's existing RODA file
+    instead
+    Parameters
+    ----------
+    client : httpx.AsyncClient
+        Client shared by all of the downloads
+    pool : concurrent.futures.ProcessPoolExecutor
+        Pool the details page is parsed in
+    database : PhysioNetDB
+        The database entry whose details page should be fetched
+    validators : dict
+        ETag and Last-Modified values of each page whose RODA file was
+        written on a previous run, keyed by URL. The values returned
+        are kept on the database entry until its file is written
+    hashes : dict
+        Hash of each page whose RODA file was written on a previous run,
+        keyed by entry ID. The hash of the page parsed is kept on the
+        database entry until its file is written
+    """
+    previous_roda = f'output/{database.entry_id}.yaml'
+    if (content := read_cache(database.url)) is None:
+        headers = {}
+        # Only revalidate files written by this version of the parser
+        previous = validators.get(database.url)
+        if os.path.isfile(previous_roda) and previous and previous[2:] == [PARSER_VERSION]:
+            etag, last_modified = previous[:2]
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+        response = await client.get(database.url, headers=headers,
+                                    follow_redirects=True)
+        if response.status_code == 304:
+            refresh_cache(database.url)
+            with open(previous_roda) as f:
+                database.restore_separate_roda(yaml.load(f, Loader=_Loader))
+            return
+        content = response.content
+        if response.status_code == 200:
+            write_cache(database.url, content)
+            database.validators = [response.headers.get('ETag'),
+                                   response.headers.get('Last-Modified'),
+                                   PARSER_VERSION]
+    digest = f'{PARSER_VERSION}-{hashlib.blake2b(content).hexdigest()}'
+    if digest == hashes.get(database.entry_id) and os.path.isfile(previous_roda):
+        with open(previous_roda) as f:
+            database.restore_separate_roda(yaml.load(f, Loader=_Loader))
+        return
+    loop = asyncio.get_running_loop()
+    database.update_details(await loop.run_in_executor(pool, parse_details, content))
+    database.digest = digest
+
+
+async def fetch_all(databases, validators, hashes):
+    """Concurrently fetches the details page of every database, parsing
+    them across all available cores
+    Parameters
+    ----------
+    databases : list
+        List of PhysioNetDB entries to fetch
+    validators : dict
+        ETag and Last-Modified values of each page whose RODA file was
+        written on a previous run, keyed by URL
+    hashes : dict
+        Hash of each page whose RODA file was written on a previous run,
+        keyed by entry ID
+    """
+    limits = httpx.Limits(max_connections=MAX_CONNECTIONS,
+                          max_keepalive_connections=MAX_CONNECTIONS)
+    # Requests queue for a free HTTP/2 stream, so don't time out waiting on the pool
+    timeout = httpx.Timeout(30.0, pool=None)
+    with ProcessPoolExecutor() as pool:
+        async with httpx.AsyncClient(http2=True, limits=limits, timeout=timeout,
+                                     headers={'Accept-Encoding': ACCEPT_ENCODING}) as client:
+            await asyncio.gather(*[fetch(client, pool, database, validators, hashes)
+                                   for database in databases])
+
+
+def write_separate_roda(database):
+    """Writes the individual RODA file of a dataset
+    Parameters
+    ----------
+    database : PhysioNetDB
+        The database entry to write
+
+    Returns
+    ----------
+    PhysioNetDB
+        The database entry, once its file has been written
+    """
+    with open(f'output/{database.entry_id}.yaml', 'w') as f:
+        yaml.dump(database.generate_separate_roda(), f,
+                  Dumper=_Dumper, sort_keys=False)
+    return database
+
+
+def main():
+    """Generates the RODA files for the PhysioNet databases"""
+    args = parser.parse_args()
+
+    # Create the output and cache directories if they don't exist
+    os.makedirs(CACHE_DIR, exist_ok=True)
+
+    # Query the page that has all of the datasets listed on them
+    database_list_url = BASE_URL + '/about/database'
+    if (database_list := read_cache(database_list_url)) is None:
+        physionet_database_list_url = session.get(database_list_url)
+        database_list = physionet_database_list_url.content
+        if physionet_database_list_url.status_code == 200:
+            write_cache(database_list_url, database_list)
+    soup = BeautifulSoup(database_list, 'lxml', from_encoding=PAGE_ENCODING)
+
+    # Look for open databases header
+    databases_header = soup.find('h2', id=args.db_type)
+    databases_ul = databases_header.find_next_sibling()
+
+    # Create a list of all of the open databases
+    open_databases = [
+        PhysioNetDB(a['href'].split('/')[2], a['href'], a.get_text(),
+                    (a.next_sibling or '').replace(':', '').strip().replace('\n', ''))
+        for li in databases_ul.select(':scope > li') if (a := li.a)
+    ]
+    end = END if END != 0 else len(open_databases)
+
+    # Get details for each database from their respective pages, revalidating
+    # pages fetched and skipping pages parsed on a previous run
+    validators = {}
+    if os.path.isfile(VALIDATORS_FILE):
+        with open(VALIDATORS_FILE) as f:
+            validators = json.load(f)
+    hashes = {}
+    if os.path.isfile(HASHES_FILE):
+        with open(HASHES_FILE) as f:
+            hashes = json.load(f)
+    asyncio.run(fetch_all(open_databases[START:end], validators, hashes))
+
+    # If in separate file mode, generate a separate YAML file for each dataset
+    # whose details have changed
+    if args.format == 'separate':
+        changed_databases = [database for database in open_databases[START:end]
+                             if not database.unchanged]
+        try:
+            with ThreadPoolExecutor(max_workers=MAX_WRITERS) as writers:
+                for database in writers.map(write_separate_roda, changed_databases):
+                    # Unchanged pages restore their details from the RODA file, so
+                    # only keep validators and hashes of the page it was written from
+                    if database.validators:
+                        validators[database.url] = database.validators
+                    else:
+                        validators.pop(database.url, None)
+                    hashes[database.entry_id] = database.digest
+        finally:
+            with open(VALIDATORS_FILE, 'w') as f:
+                json.dump(validators, f)
+            with open(HASHES_FILE, 'w') as f:
+                json.dump(hashes, f)
+    # If in single file mode, generate a single YAML file with multiple resources
+    elif args.format == 'single':
+        entry = dict(
+            Name=SINGLE_ENTRY_NAME,
+            Description=SINGLE_ENTRY_DESCRIPTION,
+            Documentation=SINGLE_ENTRY_DOCUMENTATION,
+            Contact=CONTACT_URL,
+            ManagedBy=DEFAULT_MANAGED_BY,
+            UpdateFrequency=UPDATE_FREQUENCY,
+            Tags=[],
+            License=DEFAULT_LICENSE,
+            Resources=[]
         )
-        for database in open_databases:
-            output.writerow(database.as_csv())
+        # Collect every dataset's tags once, in the order they're first seen
+        tags = dict.fromkeys(SINGLE_ENTRY_TAGS)
+        for database in open_databases[START:end]:
+            entry['Resources'].append(database.generate_single_roda())
+            tags.update(dict.fromkeys(database.tags))
+        entry['Tags'] = list(tags)
+        with open('output/single.yaml', 'w') as f:
+            yaml.dump(entry, f, Dumper=_Dumper, sort_keys=False)
+    # Not sure how we got here?
+    else:
+        print('Unknown YAML format specified')
+        sys.exit(1)
+
+    # Optionally write all of the data to a CSV file to quickly look at the data
+    if args.csv:
+        with open('output/databases.csv', 'w') as f:
+            output = csv.writer(f)
+            output.writerow(
+                ['name', 'contact', 'managed_by', 'license', 'documentation',
+                 'update_frequency', 'tags', 'description']
+            )
+            output.writerows(database.as_csv() for database in open_databases)
+
+    sys.exit(0)
+
 
-sys.exit(0)
+# Guard the entry point so the parsing processes can import this script
+if __name__ == '__main__':
+    main()